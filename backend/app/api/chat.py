@@ -1,11 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Dict, Any, Optional
 from pydantic import BaseModel
+from ..core.cache import make_cache_key, cache_get_json, cache_set_json
 from ..core.database import get_db
 from ..models.track import Track, MasteringSession
 from ..tasks import process_ai_adjustment
-from ..services.ai_mastering import AIMasteringService
+from ..services.ai_mastering import ai_service
 import logging
 
 logger = logging.getLogger(__name__)
@@ -30,107 +32,127 @@ class ChatResponse(BaseModel):
 @router.post("/mastering", response_model=ChatResponse)
 async def chat_mastering(
     request: ChatRequest,
-    db: Session = Depends(get_db)
+    cache: str = "enabled",
+    db: AsyncSession = Depends(get_db)
 ):
     """Chat interface for mastering adjustments"""
-    try:
-        # Validate track exists and is analyzed
-        track = db.query(Track).filter(Track.id == request.track_id).first()
-        if not track:
-            raise HTTPException(status_code=404, detail="Track not found")
-        
-        if not track.is_analyzed:
-            raise HTTPException(status_code=400, detail="Track must be analyzed first")
-        
-        # Prepare track analysis data
-        track_analysis = {
-            'predicted_genre': track.predicted_genre,
-            'tempo': track.tempo,
-            'key': track.key,
-            'loudness': track.loudness,
-            'frequency_analysis': track.frequency_analysis,
-            'spectral_features': track.spectral_features
-        }
-        
-        # Get AI service
-        ai_service = AIMasteringService()
-        
+    # Validate track exists and is analyzed
+    track = await db.get(Track, request.track_id)
+    if not track:
+        raise HTTPException(status_code=404, detail="Track not found")
+    
+    if not track.is_analyzed:
+        raise HTTPException(status_code=400, detail="Track must be analyzed first")
+    
+    # Use the payload assembled at analysis time; fall back to the
+    # per-column build for rows analyzed before the column existed
+    track_analysis = track.analysis_payload or {
+        'predicted_genre': track.predicted_genre,
+        'tempo': track.tempo,
+        'key': track.key,
+        'loudness': track.loudness,
+        'frequency_analysis': track.frequency_analysis,
+        'spectral_features': track.spectral_features
+    }
+    
+    # Check the response cache before paying for a Gemini roundtrip.
+    # cache=enabled caches misses, cache=replay only serves hits,
+    # cache=disabled bypasses the cache entirely.
+    cache_key = make_cache_key(
+        "chat", request.message, request.current_settings,
+        track_analysis, ai_service.model
+    )
+    result = None
+    if cache in ("enabled", "replay"):
+        result = await cache_get_json(cache_key)
+
+    if result is None:
+        if cache == "replay":
+            raise HTTPException(status_code=404, detail="No cached response for this request")
+
         # Process the user request
-        result = ai_service.process_user_request(
+        result = await ai_service.process_user_request(
             request.message,
             request.current_settings,
             track_analysis
         )
-        
-        if 'error' in result:
-            raise HTTPException(status_code=400, detail=result['error'])
-        
-        response_text = result.get('explanation', 'I understand your request.')
-        adjustments = result.get('adjustments', {})
-        suggestions = result.get('suggestions', [])
-        
-        task_id = None
-        
-        # Apply changes if requested and adjustments are available
-        if request.apply_changes and adjustments:
-            # Start background task to apply adjustments
-            task = process_ai_adjustment.delay(
-                request.track_id,
-                request.message,
-                request.current_settings
-            )
-            task_id = task.id
-            response_text += " I'm applying these changes now..."
-        
-        return ChatResponse(
-            response=response_text,
-            adjustments=adjustments,
-            task_id=task_id,
-            suggestions=suggestions
+        if cache == "enabled" and 'error' not in result:
+            await cache_set_json(cache_key, result)
+    
+    if 'error' in result:
+        raise HTTPException(status_code=400, detail=result['error'])
+    
+    response_text = result.get('explanation', 'I understand your request.')
+    adjustments = result.get('adjustments', {})
+    suggestions = result.get('suggestions', [])
+    
+    task_id = None
+    
+    # Apply changes if requested and adjustments are available
+    if request.apply_changes and adjustments:
+        # Start background task to apply adjustments
+        task = process_ai_adjustment.delay(
+            request.track_id,
+            request.message,
+            request.current_settings
         )
-        
-    except Exception as e:
-        logger.error(f"Error in chat mastering: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        task_id = task.id
+        response_text += " I'm applying these changes now..."
+    
+    return ChatResponse(
+        response=response_text,
+        adjustments=adjustments,
+        task_id=task_id,
+        suggestions=suggestions
+    )
 
 
 @router.post("/suggest")
 async def get_ai_suggestions(
     track_id: int,
-    db: Session = Depends(get_db)
+    cache: str = "enabled",
+    db: AsyncSession = Depends(get_db)
 ):
     """Get AI mastering suggestions for a track"""
-    try:
-        # Validate track exists and is analyzed
-        track = db.query(Track).filter(Track.id == track_id).first()
-        if not track:
-            raise HTTPException(status_code=404, detail="Track not found")
-        
-        if not track.is_analyzed:
-            raise HTTPException(status_code=400, detail="Track must be analyzed first")
-        
-        # Prepare track analysis data
-        track_analysis = {
-            'predicted_genre': track.predicted_genre,
-            'tempo': track.tempo,
-            'key': track.key,
-            'loudness': track.loudness,
-            'frequency_analysis': track.frequency_analysis,
-            'spectral_features': track.spectral_features
-        }
-        
-        # Get AI suggestions
-        ai_service = AIMasteringService()
-        suggestions = ai_service.analyze_and_suggest(track_analysis)
-        
-        return {
-            "track_id": track_id,
-            "suggestions": suggestions
-        }
-        
-    except Exception as e:
-        logger.error(f"Error getting AI suggestions: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    # Validate track exists and is analyzed
+    track = await db.get(Track, track_id)
+    if not track:
+        raise HTTPException(status_code=404, detail="Track not found")
+    
+    if not track.is_analyzed:
+        raise HTTPException(status_code=400, detail="Track must be analyzed first")
+    
+    # Use the payload assembled at analysis time; fall back to the
+    # per-column build for rows analyzed before the column existed
+    track_analysis = track.analysis_payload or {
+        'predicted_genre': track.predicted_genre,
+        'tempo': track.tempo,
+        'key': track.key,
+        'loudness': track.loudness,
+        'frequency_analysis': track.frequency_analysis,
+        'spectral_features': track.spectral_features
+    }
+    
+    # Get AI suggestions, served from cache when the analysis is unchanged
+    cache_key = make_cache_key("suggest", track_analysis, ai_service.model)
+    suggestions = None
+    if cache in ("enabled", "replay"):
+        suggestions = await cache_get_json(cache_key)
+
+    if suggestions is None:
+        if cache == "replay":
+            raise HTTPException(status_code=404, detail="No cached suggestions for this track")
+
+        suggestions = await ai_service.analyze_and_suggest(track_analysis)
+        # Don't cache preset fallbacks: they'd pin generic output to the
+        # track for the whole TTL after a transient Gemini outage
+        if cache == "enabled" and not suggestions.get('fallback'):
+            await cache_set_json(cache_key, suggestions)
+    
+    return {
+        "track_id": track_id,
+        "suggestions": suggestions
+    }
 
 
 @router.get("/examples")
@@ -1,98 +1,139 @@
 from fastapi import APIRouter, HTTPException
 from celery.result import AsyncResult
 from ..celery_app import celery_app
+from ..core.cache import cache_get_json, cache_set_json
+from collections import OrderedDict
+import asyncio
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
 
+# Poll coalescing: browsers poll task status every second or faster, so
+# concurrent polls for the same task collapse to one result-backend read
+# per TTL window. Single-flight locks prevent a thundering herd on miss.
+_STATUS_TTL = 0.25  # seconds
+_STATUS_CACHE_MAX = 4096
+_status_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_status_locks: dict = {}
+
+
+def _build_status_response(task_id: str) -> dict:
+    """Fetch task state from the result backend and shape the response"""
+    result = AsyncResult(task_id, app=celery_app)
+
+    if result.state == 'PENDING':
+        response = {
+            'task_id': task_id,
+            'state': result.state,
+            'status': 'Task is waiting to be processed'
+        }
+    elif result.state == 'PROGRESS':
+        response = {
+            'task_id': task_id,
+            'state': result.state,
+            'progress': result.info.get('progress', 0),
+            'status': result.info.get('status', 'Processing...')
+        }
+    elif result.state == 'SUCCESS':
+        response = {
+            'task_id': task_id,
+            'state': result.state,
+            'result': result.result,
+            'status': 'Task completed successfully'
+        }
+    elif result.state == 'FAILURE':
+        response = {
+            'task_id': task_id,
+            'state': result.state,
+            'error': str(result.info),
+            'status': 'Task failed'
+        }
+    else:
+        response = {
+            'task_id': task_id,
+            'state': result.state,
+            'status': f'Unknown state: {result.state}'
+        }
+
+    return response
+
 
 @router.get("/{task_id}")
 async def get_task_status(task_id: str):
     """Get status of a background task"""
-    try:
-        result = AsyncResult(task_id, app=celery_app)
-        
-        if result.state == 'PENDING':
-            response = {
-                'task_id': task_id,
-                'state': result.state,
-                'status': 'Task is waiting to be processed'
-            }
-        elif result.state == 'PROGRESS':
-            response = {
-                'task_id': task_id,
-                'state': result.state,
-                'progress': result.info.get('progress', 0),
-                'status': result.info.get('status', 'Processing...')
-            }
-        elif result.state == 'SUCCESS':
-            response = {
-                'task_id': task_id,
-                'state': result.state,
-                'result': result.result,
-                'status': 'Task completed successfully'
-            }
-        elif result.state == 'FAILURE':
-            response = {
-                'task_id': task_id,
-                'state': result.state,
-                'error': str(result.info),
-                'status': 'Task failed'
-            }
-        else:
-            response = {
-                'task_id': task_id,
-                'state': result.state,
-                'status': f'Unknown state: {result.state}'
-            }
-        
-        return response
-        
-    except Exception as e:
-        logger.error(f"Error getting task status: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    cached = _status_cache.get(task_id)
+    if cached and time.monotonic() - cached[0] < _STATUS_TTL:
+        return cached[1]
+
+    lock = _status_locks.setdefault(task_id, asyncio.Lock())
+    async with lock:
+        # Another poll may have refreshed the entry while we waited
+        cached = _status_cache.get(task_id)
+        if cached and time.monotonic() - cached[0] < _STATUS_TTL:
+            return cached[1]
+
+        response = await asyncio.to_thread(_build_status_response, task_id)
+
+        _status_cache[task_id] = (time.monotonic(), response)
+        _status_cache.move_to_end(task_id)
+        while len(_status_cache) > _STATUS_CACHE_MAX:
+            evicted, _ = _status_cache.popitem(last=False)
+            _status_locks.pop(evicted, None)
+
+    return response
 
 
 @router.delete("/{task_id}")
 async def cancel_task(task_id: str):
     """Cancel a background task"""
-    try:
-        celery_app.control.revoke(task_id, terminate=True)
-        return {
-            'task_id': task_id,
-            'status': 'Task cancelled'
-        }
-    except Exception as e:
-        logger.error(f"Error cancelling task: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    celery_app.control.revoke(task_id, terminate=True)
+    return {
+        'task_id': task_id,
+        'status': 'Task cancelled'
+    }
 
 
 @router.get("/")
 async def get_active_tasks():
     """Get list of active tasks"""
-    try:
-        inspect = celery_app.control.inspect()
-        active_tasks = inspect.active()
-        
-        if not active_tasks:
-            return {'active_tasks': []}
-        
-        # Flatten the tasks from all workers
-        all_tasks = []
-        for worker, tasks in active_tasks.items():
+    # Coalesce dashboard polls: serve the flattened list from a 1s cache
+    cached = await cache_get_json("tasks:active")
+    if cached is not None:
+        return {'active_tasks': cached}
+
+    inspect = celery_app.control.inspect(timeout=1.0)
+
+    # Fan the worker control RPCs out concurrently so total latency is
+    # the slowest worker roundtrip instead of the sum over all workers
+    active_tasks, reserved_tasks, scheduled_tasks = await asyncio.gather(
+        asyncio.to_thread(inspect.active),
+        asyncio.to_thread(inspect.reserved),
+        asyncio.to_thread(inspect.scheduled),
+    )
+
+    # Flatten the tasks from all workers
+    all_tasks = []
+    for state, worker_map in (
+        ('active', active_tasks),
+        ('reserved', reserved_tasks),
+        ('scheduled', scheduled_tasks),
+    ):
+        for worker, tasks in (worker_map or {}).items():
             for task in tasks:
+                # Scheduled entries nest the task info under 'request'
+                request = task.get('request', task)
                 all_tasks.append({
-                    'task_id': task['id'],
-                    'name': task['name'],
+                    'task_id': request.get('id'),
+                    'name': request.get('name'),
                     'worker': worker,
-                    'args': task.get('args', []),
-                    'kwargs': task.get('kwargs', {})
+                    'state': state,
+                    'args': request.get('args', []),
+                    'kwargs': request.get('kwargs', {})
                 })
-        
-        return {'active_tasks': all_tasks}
-        
-    except Exception as e:
-        logger.error(f"Error getting active tasks: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+
+    await cache_set_json("tasks:active", all_tasks, ttl=1)
+
+    return {'active_tasks': all_tasks}
\ No newline at end of file
@@ -1,15 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, BackgroundTasks
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from fastapi.responses import FileResponse, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Dict, Any, Optional
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
+import glob
 import os
-import uuid
+import secrets
 import aiofiles
+import anyio.to_thread
 from ..core.database import get_db
 from ..core.config import settings
 from ..models.track import Track, MasteringSession
 from ..tasks import analyze_audio_track, process_mastering, process_ai_adjustment
-from ..services.mastering_engine import MasteringEngine
+from ..services.mastering_engine import mastering_engine
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,101 +22,149 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/tracks", tags=["tracks"])
 
 
+class TrackOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    original_filename: str = Field(serialization_alias="filename")
+    duration: Optional[float] = None
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+    predicted_genre: Optional[str] = None
+    genre_confidence: Optional[float] = None
+    tempo: Optional[float] = None
+    key: Optional[str] = None
+    loudness: Optional[Dict[str, Any]] = None
+    spectral_features: Optional[Dict[str, Any]] = None
+    frequency_analysis: Optional[Dict[str, Any]] = None
+    masking_analysis: Optional[Dict[str, Any]] = None
+    stereo_analysis: Optional[Dict[str, Any]] = None
+    is_analyzed: bool = False
+    is_processed: bool = False
+    analysis_error: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+
+
+# Compiled once at import; serializing through the cached adapter avoids
+# re-building validators per request
+_track_adapter = TypeAdapter(TrackOut)
+
+# Columns serialized by get_mastering_sessions, selected as plain Rows to
+# skip ORM hydration entirely
+_SESSION_COLUMNS = (
+    MasteringSession.id,
+    MasteringSession.eq_settings,
+    MasteringSession.compression_settings,
+    MasteringSession.limiting_settings,
+    MasteringSession.saturation_settings,
+    MasteringSession.stereo_settings,
+    MasteringSession.ai_suggestions,
+    MasteringSession.user_feedback,
+    MasteringSession.processing_time,
+    MasteringSession.created_at,
+)
+
+
+def _file_download_response(path: str, filename: str, media_type: str = 'audio/mpeg') -> Response:
+    """Serve a file download, delegating to nginx sendfile when configured.
+
+    With X-Accel-Redirect enabled nginx streams the bytes via sendfile(2)
+    and the app never touches them; otherwise FileResponse is given a
+    precomputed stat_result so Starlette can take its zero-copy path.
+    """
+    if settings.USE_X_ACCEL_REDIRECT:
+        rel_path = os.path.basename(path)
+        return Response(headers={
+            "X-Accel-Redirect": f"/protected/{rel_path}",
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Content-Type": media_type,
+        })
+
+    return FileResponse(
+        path=path,
+        filename=filename,
+        media_type=media_type,
+        stat_result=os.stat(path)
+    )
+
+
 @router.post("/upload")
 async def upload_track(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Upload audio track for processing"""
-    try:
-        # Validate file type
-        file_extension = os.path.splitext(file.filename)[1].lower()
-        if file_extension not in settings.ALLOWED_AUDIO_FORMATS:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Unsupported file format. Allowed: {settings.ALLOWED_AUDIO_FORMATS}"
-            )
-        
-        # Validate file size
-        if file.size > settings.MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=400,
-                detail=f"File too large. Maximum size: {settings.MAX_FILE_SIZE / (1024*1024):.1f}MB"
-            )
-        
-        # Generate unique filename
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        file_path = os.path.join(settings.UPLOAD_DIR, unique_filename)
-        
-        # Ensure upload directory exists
-        os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
-        
-        # Save file
-        async with aiofiles.open(file_path, 'wb') as f:
-            content = await file.read()
-            await f.write(content)
-        
-        # Create track record
-        track = Track(
-            filename=unique_filename,
-            original_filename=file.filename,
-            file_path=file_path,
-            file_size=len(content)
+    # Validate file type
+    file_extension = os.path.splitext(file.filename)[1].lower()
+    if file_extension not in settings.ALLOWED_AUDIO_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported file format. Allowed: {sorted(settings.ALLOWED_AUDIO_FORMATS)}"
         )
-        
-        db.add(track)
-        db.commit()
-        db.refresh(track)
-        
-        # Start analysis task
-        task = analyze_audio_track.delay(track.id)
-        
-        return {
-            "track_id": track.id,
-            "filename": file.filename,
-            "analysis_task_id": task.id,
-            "status": "uploaded",
-            "message": "Track uploaded successfully. Analysis started."
-        }
-        
-    except Exception as e:
-        logger.error(f"Error uploading track: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    
+    # Validate client-reported file size (enforced again while streaming)
+    if file.size and file.size > settings.MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File too large. Maximum size: {settings.MAX_FILE_SIZE / (1024*1024):.1f}MB"
+        )
+
+    # Generate unique filename (upload dir is created once in lifespan)
+    unique_filename = f"{secrets.token_urlsafe(16)}{file_extension}"
+    file_path = os.path.join(settings.UPLOAD_DIR, unique_filename)
+
+    # Stream to disk in 1 MB chunks instead of buffering the whole upload
+    size = 0
+    async with aiofiles.open(file_path, 'wb') as f:
+        while chunk := await file.read(1 << 20):
+            size += len(chunk)
+            if size > settings.MAX_FILE_SIZE:
+                os.remove(file_path)
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"File too large. Maximum size: {settings.MAX_FILE_SIZE / (1024*1024):.1f}MB"
+                )
+            await f.write(chunk)
+
+    # Create track record
+    track = Track(
+        filename=unique_filename,
+        original_filename=file.filename,
+        file_path=file_path,
+        file_size=size
+    )
+    
+    db.add(track)
+    await db.commit()
+    await db.refresh(track)
+    
+    # Start analysis task
+    task = analyze_audio_track.delay(track.id)
+    
+    return {
+        "track_id": track.id,
+        "filename": file.filename,
+        "analysis_task_id": task.id,
+        "status": "uploaded",
+        "message": "Track uploaded successfully. Analysis started."
+    }
 
 
 @router.get("/{track_id}")
-async def get_track(track_id: int, db: Session = Depends(get_db)):
+async def get_track(track_id: int, db: AsyncSession = Depends(get_db)):
     """Get track information"""
-    track = db.query(Track).filter(Track.id == track_id).first()
+    track = await db.get(Track, track_id)
     if not track:
         raise HTTPException(status_code=404, detail="Track not found")
-    
-    return {
-        "id": track.id,
-        "filename": track.original_filename,
-        "duration": track.duration,
-        "sample_rate": track.sample_rate,
-        "channels": track.channels,
-        "predicted_genre": track.predicted_genre,
-        "genre_confidence": track.genre_confidence,
-        "tempo": track.tempo,
-        "key": track.key,
-        "loudness": track.loudness,
-        "spectral_features": track.spectral_features,
-        "frequency_analysis": track.frequency_analysis,
-        "masking_analysis": track.masking_analysis,
-        "stereo_analysis": track.stereo_analysis,
-        "is_analyzed": track.is_analyzed,
-        "is_processed": track.is_processed,
-        "analysis_error": track.analysis_error,
-        "created_at": track.created_at
-    }
+
+    return _track_adapter.dump_python(_track_adapter.validate_python(track), by_alias=True)
 
 
 @router.get("/{track_id}/analysis")
-async def get_track_analysis(track_id: int, db: Session = Depends(get_db)):
+async def get_track_analysis(track_id: int, db: AsyncSession = Depends(get_db)):
     """Get detailed track analysis"""
-    track = db.query(Track).filter(Track.id == track_id).first()
+    track = await db.get(Track, track_id)
     if not track:
         raise HTTPException(status_code=404, detail="Track not found")
     
@@ -139,10 +192,10 @@ async def get_track_analysis(track_id: int, db: Session = Depends(get_db)):
 async def master_track(
     track_id: int,
     mastering_settings: Dict[str, Any],
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Apply mastering to track"""
-    track = db.query(Track).filter(Track.id == track_id).first()
+    track = await db.get(Track, track_id)
     if not track:
         raise HTTPException(status_code=404, detail="Track not found")
     
@@ -161,13 +214,12 @@ async def master_track(
 
 
 @router.get("/{track_id}/preset/{genre}")
-async def get_genre_preset(track_id: int, genre: str, db: Session = Depends(get_db)):
+async def get_genre_preset(track_id: int, genre: str, db: AsyncSession = Depends(get_db)):
     """Get mastering preset for specific genre"""
-    track = db.query(Track).filter(Track.id == track_id).first()
+    track = await db.get(Track, track_id)
     if not track:
         raise HTTPException(status_code=404, detail="Track not found")
     
-    mastering_engine = MasteringEngine()
     preset = mastering_engine.get_genre_preset(genre)
     
     return {
@@ -178,106 +230,92 @@ async def get_genre_preset(track_id: int, genre: str, db: Session = Depends(get_
 
 
 @router.get("/{track_id}/download")
-async def download_original(track_id: int, db: Session = Depends(get_db)):
+async def download_original(track_id: int, db: AsyncSession = Depends(get_db)):
     """Download original track"""
-    track = db.query(Track).filter(Track.id == track_id).first()
+    track = await db.get(Track, track_id)
     if not track:
         raise HTTPException(status_code=404, detail="Track not found")
     
-    if not os.path.exists(track.file_path):
+    if not await anyio.to_thread.run_sync(os.path.exists, track.file_path):
         raise HTTPException(status_code=404, detail="File not found")
-    
-    return FileResponse(
-        path=track.file_path,
-        filename=track.original_filename,
-        media_type='audio/mpeg'
-    )
+
+    return _file_download_response(track.file_path, track.original_filename)
 
 
 @router.get("/{track_id}/download/mastered")
-async def download_mastered(track_id: int, session_id: int = None, db: Session = Depends(get_db)):
+async def download_mastered(track_id: int, session_id: int = None, db: AsyncSession = Depends(get_db)):
     """Download mastered track"""
-    track = db.query(Track).filter(Track.id == track_id).first()
+    track = await db.get(Track, track_id)
     if not track:
         raise HTTPException(status_code=404, detail="Track not found")
     
     # Get latest mastering session if session_id not provided
     if session_id:
-        session = db.query(MasteringSession).filter(
-            MasteringSession.id == session_id,
-            MasteringSession.track_id == track_id
-        ).first()
+        session = await db.get(MasteringSession, session_id)
+        if session and session.track_id != track_id:
+            session = None
     else:
-        session = db.query(MasteringSession).filter(
-            MasteringSession.track_id == track_id
-        ).order_by(MasteringSession.created_at.desc()).first()
+        session = (await db.execute(
+            select(MasteringSession)
+            .where(MasteringSession.track_id == track_id)
+            .order_by(MasteringSession.created_at.desc())
+            .limit(1)
+        )).scalar_one_or_none()
     
     if not session or not session.processed_file_path:
         raise HTTPException(status_code=404, detail="No mastered version found")
     
-    if not os.path.exists(session.processed_file_path):
+    if not await anyio.to_thread.run_sync(os.path.exists, session.processed_file_path):
         raise HTTPException(status_code=404, detail="Mastered file not found")
     
     mastered_filename = f"mastered_{track.original_filename}"
-    
-    return FileResponse(
-        path=session.processed_file_path,
-        filename=mastered_filename,
-        media_type='audio/mpeg'
-    )
+
+    return _file_download_response(session.processed_file_path, mastered_filename)
 
 
 @router.get("/{track_id}/sessions")
-async def get_mastering_sessions(track_id: int, db: Session = Depends(get_db)):
+async def get_mastering_sessions(track_id: int, db: AsyncSession = Depends(get_db)):
     """Get all mastering sessions for a track"""
-    track = db.query(Track).filter(Track.id == track_id).first()
+    track = await db.get(Track, track_id)
     if not track:
         raise HTTPException(status_code=404, detail="Track not found")
     
-    sessions = db.query(MasteringSession).filter(
-        MasteringSession.track_id == track_id
-    ).order_by(MasteringSession.created_at.desc()).all()
-    
+    # Single round-trip for exactly the columns we serialize, as plain
+    # Rows — no ORM hydration or identity-map bookkeeping per session
+    rows = (await db.execute(
+        select(*_SESSION_COLUMNS)
+        .where(MasteringSession.track_id == track_id)
+        .order_by(MasteringSession.created_at.desc())
+    )).all()
+
     return {
         "track_id": track_id,
-        "sessions": [
-            {
-                "id": session.id,
-                "eq_settings": session.eq_settings,
-                "compression_settings": session.compression_settings,
-                "limiting_settings": session.limiting_settings,
-                "saturation_settings": session.saturation_settings,
-                "stereo_settings": session.stereo_settings,
-                "ai_suggestions": session.ai_suggestions,
-                "user_feedback": session.user_feedback,
-                "processing_time": session.processing_time,
-                "created_at": session.created_at
-            }
-            for session in sessions
-        ]
+        "sessions": [dict(r._mapping) for r in rows]
     }
 
 
 @router.delete("/{track_id}")
-async def delete_track(track_id: int, db: Session = Depends(get_db)):
+async def delete_track(track_id: int, db: AsyncSession = Depends(get_db)):
     """Delete track and associated files"""
-    track = db.query(Track).filter(Track.id == track_id).first()
+    track = await db.get(Track, track_id)
     if not track:
         raise HTTPException(status_code=404, detail="Track not found")
     
-    # Delete associated mastering sessions
-    sessions = db.query(MasteringSession).filter(MasteringSession.track_id == track_id).all()
-    for session in sessions:
+    # Remove processed files; session rows are deleted by the FK cascade
+    for session in track.sessions:
         if session.processed_file_path and os.path.exists(session.processed_file_path):
             os.remove(session.processed_file_path)
-        db.delete(session)
-    
+
     # Delete original file
     if os.path.exists(track.file_path):
         os.remove(track.file_path)
-    
-    # Delete track record
-    db.delete(track)
-    db.commit()
+
+    # Drop the decoded-PCM cache written by the mastering worker
+    for pcm_path in glob.glob(os.path.join(settings.UPLOAD_DIR, f"pcm_{track_id}_*.npy")):
+        os.remove(pcm_path)
+
+    # Delete track record (cascades to mastering sessions)
+    await db.delete(track)
+    await db.commit()
     
     return {"message": "Track deleted successfully"}
@@ -21,4 +21,11 @@ celery_app.conf.update(
     task_soft_time_limit=25 * 60,  # 25 minutes
     worker_prefetch_multiplier=1,
     worker_max_tasks_per_child=1000,
+    # Long CPU-bound mastering renders get their own queue so quick
+    # interactive tasks (analysis, AI adjustments) never sit behind one.
+    # Workers consume with -Q default or -Q dsp; see docker-compose.yml.
+    task_default_queue='default',
+    task_routes={
+        'app.tasks.process_mastering': {'queue': 'dsp'},
+    },
 )
@@ -0,0 +1,40 @@
+import hashlib
+import logging
+from typing import Any, Optional
+
+import orjson
+import redis.asyncio as aioredis
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# AI responses are deterministic for identical inputs, so keep them for a day
+AI_RESPONSE_TTL = 24 * 60 * 60
+
+redis_client = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
+
+
+def make_cache_key(prefix: str, *parts: Any) -> str:
+    """Build a deterministic cache key from JSON-serializable parts"""
+    canonical = orjson.dumps(parts, option=orjson.OPT_SORT_KEYS, default=str)
+    return f"{prefix}:{hashlib.sha256(canonical).hexdigest()}"
+
+
+async def cache_get_json(key: str) -> Optional[Any]:
+    """Fetch and decode a cached JSON value; returns None on miss or error"""
+    try:
+        cached = await redis_client.get(key)
+        if cached is not None:
+            return orjson.loads(cached)
+    except Exception as e:
+        logger.warning(f"Cache read failed for {key}: {e}")
+    return None
+
+
+async def cache_set_json(key: str, value: Any, ttl: int = AI_RESPONSE_TTL) -> None:
+    """Store a JSON-serializable value with a TTL; failures are non-fatal"""
+    try:
+        await redis_client.setex(key, ttl, orjson.dumps(value, default=str))
+    except Exception as e:
+        logger.warning(f"Cache write failed for {key}: {e}")
@@ -15,26 +15,33 @@ class Settings(BaseSettings):
     
     # File Upload
     UPLOAD_DIR: str = "uploads"
+    # Offload downloads to nginx via X-Accel-Redirect (requires the internal
+    # /protected/ location in nginx.conf)
+    USE_X_ACCEL_REDIRECT: bool = False
     MAX_FILE_SIZE: int = 100 * 1024 * 1024  # 100MB
-    ALLOWED_AUDIO_FORMATS: list = [".wav", ".mp3", ".flac", ".aiff", ".m4a"]
+    # frozenset: O(1) membership checks on the upload hot path
+    ALLOWED_AUDIO_FORMATS: frozenset = frozenset({".wav", ".mp3", ".flac", ".aiff", ".m4a"})
     
     # Audio Processing
     SAMPLE_RATE: int = 44100
     CHUNK_SIZE: int = 1024
+    # On-disk cache of analysis results keyed by file content hash
+    ANALYSIS_CACHE_DIR: str = os.getenv("ANALYSIS_CACHE_DIR", "/tmp/aim_cache")
     
     # Security
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
-    # CORS
+    # CORS — exact origins; wildcard subdomains are matched by the regex
+    # below, which CORSMiddleware compiles once at startup
     ALLOWED_ORIGINS: list = [
         "http://localhost:3000",
         "http://localhost:80",
         "http://127.0.0.1:3000",
         "https://aimastering.loca.lt",
-        "https://*.loca.lt",
     ]
+    ALLOWED_ORIGIN_REGEX: str = r"https://[a-z0-9-]+\.loca\.lt"
     
     class Config:
         env_file = ".env"
@@ -1,12 +1,15 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 import logging
 import os
+import time
 
 from .core.config import settings
-from .core.database import engine, Base
+from .core.database import engine, async_engine, Base
+from .services.ai_mastering import ai_service
 from .api import api_router
 
 # Configure logging
@@ -27,6 +30,9 @@ async def lifespan(app: FastAPI):
     # Create upload directory
     os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
     logger.info(f"Upload directory created: {settings.UPLOAD_DIR}")
+
+    # Expose the shared AI service on app state for tests and overrides
+    app.state.ai_service = ai_service
     
     yield
     
@@ -39,6 +45,7 @@ app = FastAPI(
     title="AI Mastering Service",
     description="Professional AI-powered audio mastering with Gemini 2.5 Flash",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -46,11 +53,19 @@ app = FastAPI(
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.ALLOWED_ORIGINS,
+    allow_origin_regex=settings.ALLOWED_ORIGIN_REGEX,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
+@app.exception_handler(Exception)
+async def unhandled_exception_handler(request: Request, exc: Exception):
+    """Log unexpected errors once and return a generic 500"""
+    logger.error(f"Unhandled error on {request.method} {request.url.path}: {exc}")
+    return ORJSONResponse(status_code=500, content={"detail": "Internal server error"})
+
+
 # Include API routes
 app.include_router(api_router)
 
@@ -71,22 +86,34 @@ async def root():
     }
 
 
+# Liveness probes can fire once per second per pod; one cached payload per
+# TTL window keeps them from turning into DB traffic
+_HEALTH_TTL = 1.0  # seconds
+_health_cache = {"ts": 0.0, "payload": None}
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
+    if _health_cache["payload"] is not None and time.monotonic() - _health_cache["ts"] < _HEALTH_TTL:
+        return _health_cache["payload"]
+
     try:
-        # Check database connection
-        from .core.database import SessionLocal
-        from sqlalchemy import text
-        db = SessionLocal()
-        db.execute(text("SELECT 1"))
-        db.close()
-
-        return {
+        # Connection-level probe: no ORM session or transaction overhead
+        async with async_engine.connect() as conn:
+            await conn.exec_driver_sql("SELECT 1")
+
+        payload = {
             "status": "healthy",
             "database": "connected",
+            # The async engine serves all request traffic; the sync one
+            # only creates tables at startup and backs the Celery workers
+            "pool": async_engine.pool.status(),
             "gemini_api": "configured" if settings.GEMINI_API_KEY else "not configured"
         }
+        _health_cache["ts"] = time.monotonic()
+        _health_cache["payload"] = payload
+        return payload
     except Exception as e:
         logger.error(f"Health check failed: {e}")
         raise HTTPException(status_code=503, detail="Service unhealthy")
@@ -1,4 +1,6 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, JSON, Boolean, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..core.database import Base
 
@@ -19,19 +21,22 @@ class Track(Base):
     bit_depth = Column(Integer, nullable=True)
     
     # ML Analysis
-    predicted_genre = Column(String, nullable=True)
+    predicted_genre = Column(String, nullable=True, index=True)
     genre_confidence = Column(Float, nullable=True)
     tempo = Column(Float, nullable=True)
     key = Column(String, nullable=True)
-    loudness = Column(JSON, nullable=True)
+    loudness = Column(JSONB, nullable=True)
     
     # Frequency Analysis
-    spectral_features = Column(JSON, nullable=True)  # Store as JSON
-    frequency_analysis = Column(JSON, nullable=True)
+    spectral_features = Column(JSONB, nullable=True)  # Store as JSON
+    frequency_analysis = Column(JSONB, nullable=True)
 
     # Advanced Analysis
-    masking_analysis = Column(JSON, nullable=True)  # Frequency masking analysis
-    stereo_analysis = Column(JSON, nullable=True)   # Stereo imaging analysis
+    masking_analysis = Column(JSONB, nullable=True)  # Frequency masking analysis
+    stereo_analysis = Column(JSONB, nullable=True)   # Stereo imaging analysis
+
+    # Pre-assembled analysis dict served to the AI endpoints
+    analysis_payload = Column(JSONB, nullable=True)
     
     # Processing Status
     is_analyzed = Column(Boolean, default=False)
@@ -42,28 +47,44 @@ class Track(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    # Mastering sessions for this track (eager-loaded, deleted with the track)
+    sessions = relationship(
+        "MasteringSession",
+        back_populates="track",
+        lazy="selectin",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+
 
 class MasteringSession(Base):
     __tablename__ = "mastering_sessions"
-    
+
     id = Column(Integer, primary_key=True, index=True)
-    track_id = Column(Integer, nullable=False)
+    track_id = Column(Integer, ForeignKey("tracks.id", ondelete="CASCADE"), nullable=False, index=True)
     
     # Mastering Parameters
-    eq_settings = Column(JSON, nullable=True)
-    compression_settings = Column(JSON, nullable=True)
-    limiting_settings = Column(JSON, nullable=True)
-    saturation_settings = Column(JSON, nullable=True)
-    stereo_settings = Column(JSON, nullable=True)
+    eq_settings = Column(JSONB, nullable=True)
+    compression_settings = Column(JSONB, nullable=True)
+    limiting_settings = Column(JSONB, nullable=True)
+    saturation_settings = Column(JSONB, nullable=True)
+    stereo_settings = Column(JSONB, nullable=True)
     
     # AI Suggestions
-    ai_suggestions = Column(JSON, nullable=True)
+    ai_suggestions = Column(JSONB, nullable=True)
     user_feedback = Column(Text, nullable=True)
     
     # Output
     processed_file_path = Column(String, nullable=True)
     processing_time = Column(Float, nullable=True)
-    
+
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    track = relationship("Track", back_populates="sessions")
+
+    # Covers the "latest session for track" lookup in /download/mastered
+    __table_args__ = (
+        Index("ix_session_track_created", track_id, created_at.desc()),
+    )
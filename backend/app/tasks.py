@@ -1,79 +1,232 @@
 from celery import current_task
+from celery.exceptions import Ignore
+from celery.signals import worker_process_init
 from .celery_app import celery_app
 from .services.audio_analyzer import AudioAnalyzer
-from .services.mastering_engine import MasteringEngine
-from .services.ai_mastering import AIMasteringService
+from .services.mastering_engine import MasteringEngine, HAS_FAST_KERNEL
+from .services.ai_mastering import ai_service
 from .core.database import SessionLocal
 from .models.track import Track, MasteringSession
+from sqlalchemy import update
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import glob
+import hashlib
 import librosa
+import orjson
 import soundfile as sf
 import numpy as np
 import os
 import logging
-from typing import Dict, Any
+import time
+from typing import Dict, Any, Optional
 
 logger = logging.getLogger(__name__)
 
+# Overlaps the Gemini round-trip with DB work in analyze_audio_track;
+# shared so repeated tasks don't spin threads up and down
+_ai_executor = ThreadPoolExecutor(max_workers=2)
+
+
+# Worker-process-local service instances. Building these per task repeats
+# model loading and filter-design work that doesn't change between jobs.
+@lru_cache(maxsize=1)
+def _get_analyzer() -> AudioAnalyzer:
+    return AudioAnalyzer()
+
+
+@lru_cache(maxsize=4)
+def _get_engine(sample_rate: int) -> MasteringEngine:
+    return MasteringEngine(sample_rate=sample_rate)
+
+
+@worker_process_init.connect
+def _prewarm_services(**kwargs):
+    """Pay the analyzer construction cost at fork, not on the first job.
+
+    The mastering engine's recursive DSP kernels are numba-compiled and
+    warmed when its module is imported (before the worker forks), so
+    here we only record which path this deployment is running.
+    """
+    _get_analyzer()
+    logger.info(
+        "Mastering DSP kernels: %s",
+        "numba-compiled" if HAS_FAST_KERNEL else "pure Python (numba not installed)"
+    )
+
+
+class _ProgressThrottle:
+    """Rate-limit update_state calls; each one is a backend round-trip.
+
+    Pushes only when progress moved >= 5% or 500 ms passed since the last
+    push. 100% always goes through so the final state is never dropped.
+    """
+
+    def __init__(self):
+        self._last_pct = -10
+        self._last_t = 0.0
+
+    def push(self, pct: int, status: Optional[str] = None):
+        now = time.monotonic()
+        if pct < 100 and pct - self._last_pct < 5 and now - self._last_t < 0.5:
+            return
+        meta = {'progress': pct}
+        if status:
+            meta['status'] = status
+        current_task.update_state(state='PROGRESS', meta=meta)
+        self._last_pct = pct
+        self._last_t = now
+
+
+def _pcm_cache_path(track_id: int, sample_rate: int) -> str:
+    # Sample rate rides in the filename since .npy stores only the array
+    return os.path.join("uploads", f"pcm_{track_id}_{sample_rate}.npy")
+
+
+def _load_cached_pcm(track_id: int) -> Optional[tuple]:
+    """Return (audio, sample_rate) from the decoded-PCM cache, or None.
+
+    The cache is written by the first mastering job for a track; users
+    iterating on settings through the AI chat re-master the same file
+    repeatedly, and the memmap load skips the full decode each time.
+    """
+    for path in glob.glob(os.path.join("uploads", f"pcm_{track_id}_*.npy")):
+        try:
+            sample_rate = int(path.rsplit('_', 1)[1][:-4])
+            return np.load(path, mmap_mode='r'), sample_rate
+        except (ValueError, OSError):
+            continue
+    return None
+
+
+# 131072 frames x 2 channels x 4 bytes = 1 MiB of float32 per write
+_WRITE_CHUNK_FRAMES = 1 << 17
+
+
+def _write_master(output_path: str, stereo_view: np.ndarray, sample_rate: int) -> None:
+    """Write the (samples, 2) buffer to a PCM_24 WAV in 1 MiB chunks.
+
+    The stereo input is usually a transposed or broadcast view; a single
+    sf.write would materialize the whole interleaved copy before handing
+    it to libsndfile. Chunked writes cap that staging copy at 1 MiB and
+    let the OS overlap flushing with the next chunk's conversion. The
+    file is preallocated so the filesystem can reserve extents up front.
+    """
+    frames = stereo_view.shape[0]
+    fd = os.open(output_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        try:
+            # 44-byte header + 24-bit stereo frames; fallocate is
+            # Linux-only and purely advisory here
+            os.posix_fallocate(fd, 0, 44 + frames * 6)
+        except (AttributeError, OSError):
+            pass
+        out = sf.SoundFile(fd, mode='w', samplerate=int(sample_rate),
+                           channels=2, subtype='PCM_24', format='WAV')
+    except Exception:
+        os.close(fd)
+        raise
+    with out:  # closes the fd on exit
+        for start in range(0, frames, _WRITE_CHUNK_FRAMES):
+            out.write(np.ascontiguousarray(stereo_view[start:start + _WRITE_CHUNK_FRAMES]))
+
+
+def _to_stereo_view(x: np.ndarray) -> np.ndarray:
+    """Return audio as (samples, 2) for soundfile, avoiding copies.
+
+    (2, N) input becomes a transposed view, (N, 2) passes through, and
+    mono is duplicated with a zero-copy broadcast. sf.write reads the
+    result; only truly mono input ever triggers an allocation downstream.
+    """
+    if x.ndim > 1:
+        if x.shape[0] == 2:
+            return x.T  # view
+        if x.shape[1] == 2:
+            return x
+        mono = x[0] if x.shape[0] == 1 else x[:, 0]
+    else:
+        mono = x
+    return np.broadcast_to(mono[:, None], (mono.shape[0], 2))
+
 
 @celery_app.task(bind=True)
 def analyze_audio_track(self, track_id: int):
     """Analyze audio track in background"""
     db = SessionLocal()
+    prog = _ProgressThrottle()
     try:
         # Update task status
-        current_task.update_state(state='PROGRESS', meta={'progress': 10})
-        
-        # Get track from database
-        track = db.query(Track).filter(Track.id == track_id).first()
-        if not track:
+        prog.push(10)
+
+        # Only the file path is needed up front; the analysis results go
+        # back via a bare UPDATE, so skip loading the full ORM row
+        row = db.query(Track.file_path).filter(Track.id == track_id).first()
+        if not row:
             raise ValueError(f"Track {track_id} not found")
-        
-        current_task.update_state(state='PROGRESS', meta={'progress': 20})
+        file_path = row[0]
+
+        prog.push(20)
 
-        # Initialize analyzer
-        analyzer = AudioAnalyzer()
+        # Reuse the worker-local analyzer
+        analyzer = _get_analyzer()
 
-        current_task.update_state(state='PROGRESS', meta={'progress': 30})
+        prog.push(30)
 
         # Define progress callback
         def progress_callback(step: str, progress: int):
             # Map analysis steps to progress range 30-60%
             mapped_progress = 30 + (progress * 0.3)  # 30% base + 30% range
-            current_task.update_state(state='PROGRESS', meta={
-                'progress': int(mapped_progress),
-                'status': f'Analyzing: {step}'
-            })
+            prog.push(int(mapped_progress), status=f'Analyzing: {step}')
 
         # Analyze the track with progress updates
-        analysis_results = analyzer.analyze_track(track.file_path, progress_callback)
-
-        current_task.update_state(state='PROGRESS', meta={'progress': 60})
-
-        # Update track with analysis results
-        track.duration = analysis_results['duration']
-        track.sample_rate = analysis_results['sample_rate']
-        track.channels = analysis_results['channels']
-        track.predicted_genre = analysis_results['predicted_genre']
-        track.genre_confidence = analysis_results['genre_confidence']
-        track.tempo = analysis_results['tempo']
-        track.key = analysis_results['key']
-        track.loudness = analysis_results['loudness']
-        track.spectral_features = analysis_results['spectral_features']
-        track.frequency_analysis = analysis_results['frequency_analysis']
-        track.masking_analysis = analysis_results.get('masking_analysis')
-        track.stereo_analysis = analysis_results.get('stereo_analysis')
-        track.is_analyzed = True
+        analysis_results = analyzer.analyze_track(file_path, progress_callback)
 
-        db.commit()
+        prog.push(60)
 
-        current_task.update_state(state='PROGRESS', meta={'progress': 75})
-        
-        # Get AI suggestions
-        current_task.update_state(state='PROGRESS', meta={'progress': 80})
-        ai_service = AIMasteringService()
-        ai_suggestions = ai_service.analyze_and_suggest(analysis_results)
+        # Kick off the AI suggestion request now: it only reads the
+        # finished analysis dict, so the network round-trip runs while
+        # the large UPDATE below is serialized and flushed to Postgres
+        ai_future = _ai_executor.submit(ai_service.analyze_and_suggest_sync, analysis_results)
 
-        current_task.update_state(state='PROGRESS', meta={'progress': 95})
+        # Stage the analysis results as a single bare UPDATE — no loaded
+        # instance to dirty-track, and the large JSON columns go straight
+        # to bound parameters. Committed together with the mastering
+        # session below so the task costs one fsync, not two.
+        db.execute(
+            update(Track).where(Track.id == track_id).values(
+                duration=analysis_results['duration'],
+                sample_rate=analysis_results['sample_rate'],
+                channels=analysis_results['channels'],
+                predicted_genre=analysis_results['predicted_genre'],
+                genre_confidence=analysis_results['genre_confidence'],
+                tempo=analysis_results['tempo'],
+                key=analysis_results['key'],
+                loudness=analysis_results['loudness'],
+                spectral_features=analysis_results['spectral_features'],
+                frequency_analysis=analysis_results['frequency_analysis'],
+                masking_analysis=analysis_results.get('masking_analysis'),
+                stereo_analysis=analysis_results.get('stereo_analysis'),
+                # Pre-assemble the dict the AI endpoints send to Gemini so
+                # request handlers read one column instead of rebuilding it
+                analysis_payload={
+                    'predicted_genre': analysis_results['predicted_genre'],
+                    'tempo': analysis_results['tempo'],
+                    'key': analysis_results['key'],
+                    'loudness': analysis_results['loudness'],
+                    'frequency_analysis': analysis_results['frequency_analysis'],
+                    'spectral_features': analysis_results['spectral_features']
+                },
+                is_analyzed=True,
+            )
+        )
+
+        prog.push(75)
+
+        # Join the AI suggestion request started before the DB write
+        prog.push(80)
+        ai_suggestions = ai_future.result()
+
+        prog.push(95)
 
         # Automatically apply AI suggestions by creating a mastering session
         if ai_suggestions and 'eq_settings' in ai_suggestions:
@@ -91,18 +244,23 @@ def analyze_audio_track(self, track_id: int):
                 )
 
                 db.add(mastering_session)
-                db.commit()
 
                 logger.info(f"Applied AI suggestions automatically for track {track_id}")
 
             except Exception as e:
                 logger.error(f"Error applying AI suggestions for track {track_id}: {e}")
 
-        current_task.update_state(state='PROGRESS', meta={'progress': 100})
+        db.commit()
+
+        prog.push(100)
 
+        # The full analysis is multi-MB of JSON and already persisted on
+        # the Track row; callers fetch it from /tracks/{id}. Returning it
+        # here would serialize the whole blob into the result backend.
+        # The AI settings dict is small and the uploader applies it
+        # straight from the task result, so it stays.
         return {
             'track_id': track_id,
-            'analysis': analysis_results,
             'ai_suggestions': ai_suggestions,
             'auto_applied': True,
             'status': 'completed'
@@ -110,12 +268,18 @@ def analyze_audio_track(self, track_id: int):
         
     except Exception as e:
         logger.error(f"Error analyzing track {track_id}: {e}")
-        
-        # Update track with error
-        track = db.query(Track).filter(Track.id == track_id).first()
-        if track:
-            track.analysis_error = str(e)
+
+        # Discard any staged-but-uncommitted analysis update, then record
+        # the error with a bare UPDATE — no need to re-load the row.
+        # Guarded so a DB outage doesn't mask the original exception.
+        try:
+            db.rollback()
+            db.execute(
+                update(Track).where(Track.id == track_id).values(analysis_error=str(e))
+            )
             db.commit()
+        except Exception as db_error:
+            logger.error(f"Could not record analysis error for track {track_id}: {db_error}")
         
         current_task.update_state(
             state='FAILURE',
@@ -130,69 +294,92 @@ def analyze_audio_track(self, track_id: int):
 def process_mastering(self, track_id: int, mastering_settings: Dict[str, Any]):
     """Apply mastering processing to track"""
     db = SessionLocal()
+    prog = _ProgressThrottle()
     try:
-        current_task.update_state(state='PROGRESS', meta={'progress': 10})
-        
+        prog.push(10)
+
         # Get track from database
         track = db.query(Track).filter(Track.id == track_id).first()
         if not track:
             raise ValueError(f"Track {track_id} not found")
-        
-        current_task.update_state(state='PROGRESS', meta={'progress': 20})
-        
-        # Load audio file (preserve stereo)
-        audio_data, sample_rate = librosa.load(track.file_path, sr=None, mono=False)
-        
-        current_task.update_state(state='PROGRESS', meta={'progress': 40})
-        
-        # Initialize mastering engine
-        mastering_engine = MasteringEngine(sample_rate=sample_rate)
-        
-        # Apply mastering chain
-        processed_audio = mastering_engine.apply_mastering_chain(audio_data, mastering_settings)
-        
-        current_task.update_state(state='PROGRESS', meta={'progress': 70})
-        
-        # Save processed audio with unique filename based on settings hash
-        import hashlib
-        import json
 
-        # Create a hash of the mastering settings to ensure consistency
-        settings_str = json.dumps(mastering_settings, sort_keys=True)
-        settings_hash = hashlib.md5(settings_str.encode()).hexdigest()[:8]
+        prog.push(20)
 
+        # Settings hash up front: if this exact render already exists on
+        # disk (UI retry, AI adjust re-sending identical settings), skip
+        # the decode and DSP entirely and just record the session
+        canonical = orjson.dumps(mastering_settings, option=orjson.OPT_SORT_KEYS)
+        settings_hash = hashlib.blake2b(canonical, digest_size=4).hexdigest()
         output_filename = f"mastered_{track.id}_{settings_hash}.wav"
         output_path = os.path.join("uploads", output_filename)
 
-        # Handle stereo output properly - always save as stereo
-        print(f"Processed audio shape before saving: {processed_audio.shape}")
-
-        if len(processed_audio.shape) > 1:
-            if processed_audio.shape[0] == 2:
-                # Stereo format (2, samples) - transpose to (samples, 2) for soundfile
-                processed_audio = processed_audio.T
-            elif processed_audio.shape[1] == 2:
-                # Already in (samples, 2) format
-                pass
-            else:
-                # Single channel in 2D - convert to stereo
-                if processed_audio.shape[0] == 1:
-                    mono_channel = processed_audio[0]
-                else:
-                    mono_channel = processed_audio[:, 0]
-                processed_audio = np.column_stack([mono_channel, mono_channel])
+        if os.path.exists(output_path):
+            mastering_session = MasteringSession(
+                track_id=track_id,
+                eq_settings=mastering_settings.get('eq_settings'),
+                compression_settings=mastering_settings.get('compression_settings'),
+                limiting_settings=mastering_settings.get('limiting_settings'),
+                saturation_settings=mastering_settings.get('saturation_settings'),
+                stereo_settings=mastering_settings.get('stereo_settings'),
+                processed_file_path=output_path
+            )
+            db.add(mastering_session)
+            track.is_processed = True
+            db.commit()
+
+            prog.push(100)
+            return {
+                'track_id': track_id,
+                'session_id': mastering_session.id,
+                'output_path': output_path,
+                'status': 'cached'
+            }
+
+        # Reuse PCM decoded by an earlier mastering pass for this track;
+        # otherwise decode and cache it for the next settings iteration
+        cached = _load_cached_pcm(track_id)
+        if cached is not None:
+            audio_data, sample_rate = cached
         else:
-            # Mono 1D array - convert to stereo
-            processed_audio = np.column_stack([processed_audio, processed_audio])
+            # Load audio file (preserve stereo). soundfile decodes WAV/FLAC
+            # straight into float32 at native rate; librosa stays as the
+            # fallback for formats it can't open (mp3/m4a via audioread).
+            try:
+                data, sample_rate = sf.read(track.file_path, dtype='float32', always_2d=True)
+                # Planar C-order (channels, samples): each channel row is a
+                # contiguous mono array, which is what the DSP stages and
+                # the compiled kernels want. Copying here instead of inside
+                # the chain also means the .npy cache below stores this
+                # layout, so cached re-masters memmap it with zero copies —
+                # the chain's own ascontiguousarray becomes a no-op.
+                audio_data = np.ascontiguousarray(data.T)
+            except (RuntimeError, sf.LibsndfileError):
+                audio_data, sample_rate = librosa.load(track.file_path, sr=None, mono=False)
 
-        # Final check - ensure exactly 2 channels
-        if len(processed_audio.shape) == 2 and processed_audio.shape[1] == 1:
-            processed_audio = np.column_stack([processed_audio[:, 0], processed_audio[:, 0]])
+            try:
+                np.save(_pcm_cache_path(track_id, int(sample_rate)), audio_data)
+            except OSError as e:
+                logger.warning(f"Could not cache decoded PCM for track {track_id}: {e}")
 
-        print(f"Final audio shape for saving: {processed_audio.shape}")
-        sf.write(output_path, processed_audio, sample_rate)
+        prog.push(40)
         
-        current_task.update_state(state='PROGRESS', meta={'progress': 90})
+        # Reuse the worker-local engine for this sample rate; the engine
+        # is stateless between calls so instances are safe to share
+        mastering_engine = _get_engine(int(sample_rate))
+        
+        # Apply mastering chain
+        processed_audio = mastering_engine.apply_mastering_chain(audio_data, mastering_settings)
+
+        prog.push(70)
+
+        # Always save as stereo; _to_stereo_view hands the writer a view
+        # (or zero-copy broadcast) and _write_master streams it to disk
+        # in bounded chunks. PCM_24 is the mastering deliverable and 25%
+        # smaller than the 32-bit float WAV libsndfile would pick for a
+        # float32 buffer.
+        _write_master(output_path, _to_stereo_view(processed_audio), sample_rate)
+
+        prog.push(90)
         
         # Create mastering session record
         mastering_session = MasteringSession(
@@ -211,9 +398,9 @@ def process_mastering(self, track_id: int, mastering_settings: Dict[str, Any]):
         track.is_processed = True
         
         db.commit()
-        
-        current_task.update_state(state='PROGRESS', meta={'progress': 100})
-        
+
+        prog.push(100)
+
         return {
             'track_id': track_id,
             'session_id': mastering_session.id,
@@ -244,8 +431,9 @@ def process_ai_adjustment(self, track_id: int, user_message: str, current_settin
         if not track or not track.is_analyzed:
             raise ValueError(f"Track {track_id} not found or not analyzed")
         
-        # Prepare track analysis data
-        track_analysis = {
+        # Use the payload assembled at analysis time; fall back to the
+        # per-column build for rows analyzed before the column existed
+        track_analysis = track.analysis_payload or {
             'predicted_genre': track.predicted_genre,
             'tempo': track.tempo,
             'key': track.key,
@@ -256,9 +444,8 @@ def process_ai_adjustment(self, track_id: int, user_message: str, current_settin
         
         current_task.update_state(state='PROGRESS', meta={'progress': 50})
         
-        # Get AI suggestions
-        ai_service = AIMasteringService()
-        adjustments = ai_service.process_user_request(user_message, current_settings, track_analysis)
+        # Get AI suggestions from the shared service singleton
+        adjustments = ai_service.process_user_request_sync(user_message, current_settings, track_analysis)
         
         current_task.update_state(state='PROGRESS', meta={'progress': 80})
         
@@ -272,25 +459,22 @@ def process_ai_adjustment(self, track_id: int, user_message: str, current_settin
                 else:
                     updated_settings[key] = value
             
-            # Process the updated mastering
-            result = process_mastering.delay(track_id, updated_settings)
-            
-            current_task.update_state(state='PROGRESS', meta={'progress': 100})
-            
-            return {
-                'track_id': track_id,
-                'adjustments': adjustments,
-                'updated_settings': updated_settings,
-                'processing_task_id': result.id,
-                'status': 'completed'
-            }
+            # Hand the rest of the job to process_mastering (routed to the
+            # dsp queue). replace() ends this task immediately and the new
+            # task inherits our task id, so pollers follow the render
+            # itself instead of a finished parent — and the backend stores
+            # one result instead of two.
+            raise self.replace(process_mastering.si(track_id, updated_settings))
         else:
             return {
                 'track_id': track_id,
                 'adjustments': adjustments,
                 'status': 'completed'
             }
-        
+
+    except Ignore:
+        # Raised by self.replace when handing off to process_mastering
+        raise
     except Exception as e:
         logger.error(f"Error processing AI adjustment for track {track_id}: {e}")
         current_task.update_state(
@@ -2,39 +2,43 @@
 """
 Simple test script for the AI Mastering API
 """
-import requests
-import json
+import asyncio
+import httpx
 
 BASE_URL = "http://localhost:8000"
 
-def test_health():
+
+async def test_health(client):
     """Test health endpoint"""
     print("Testing health endpoint...")
-    response = requests.get(f"{BASE_URL}/health")
+    response = await client.get("/health")
     print(f"Status: {response.status_code}")
     print(f"Response: {response.json()}")
     return response.status_code == 200
 
-def test_root():
+
+async def test_root(client):
     """Test root endpoint"""
     print("\nTesting root endpoint...")
-    response = requests.get(f"{BASE_URL}/")
+    response = await client.get("/")
     print(f"Status: {response.status_code}")
     print(f"Response: {response.json()}")
     return response.status_code == 200
 
-def test_docs():
+
+async def test_docs(client):
     """Test docs endpoint"""
     print("\nTesting docs endpoint...")
-    response = requests.get(f"{BASE_URL}/docs")
+    response = await client.get("/docs")
     print(f"Status: {response.status_code}")
     print(f"Content-Type: {response.headers.get('content-type')}")
     return response.status_code == 200
 
-def test_chat_examples():
+
+async def test_chat_examples(client):
     """Test chat examples endpoint"""
     print("\nTesting chat examples endpoint...")
-    response = requests.get(f"{BASE_URL}/api/chat/examples")
+    response = await client.get("/api/chat/examples")
     print(f"Status: {response.status_code}")
     if response.status_code == 200:
         data = response.json()
@@ -43,34 +47,42 @@ def test_chat_examples():
             print(f"  - {category['category']}: {len(category['commands'])} commands")
     return response.status_code == 200
 
-def main():
-    """Run all tests"""
+
+async def main():
+    """Run all tests concurrently over one pooled connection"""
     print("🎵 AI Mastering Service - API Test Suite")
     print("=" * 50)
-    
+
     tests = [
         ("Health Check", test_health),
         ("Root Endpoint", test_root),
         ("API Documentation", test_docs),
         ("Chat Examples", test_chat_examples),
     ]
-    
+
+    # One AsyncClient reuses connections across all probes, and gather
+    # makes total runtime the slowest request instead of the sum
+    async with httpx.AsyncClient(base_url=BASE_URL) as client:
+        results = await asyncio.gather(
+            *(test_func(client) for _, test_func in tests),
+            return_exceptions=True
+        )
+
     passed = 0
     total = len(tests)
-    
-    for test_name, test_func in tests:
-        try:
-            if test_func():
-                print(f"✅ {test_name} - PASSED")
-                passed += 1
-            else:
-                print(f"❌ {test_name} - FAILED")
-        except Exception as e:
-            print(f"❌ {test_name} - ERROR: {e}")
-    
+
+    for (test_name, _), result in zip(tests, results):
+        if isinstance(result, Exception):
+            print(f"❌ {test_name} - ERROR: {result}")
+        elif result:
+            print(f"✅ {test_name} - PASSED")
+            passed += 1
+        else:
+            print(f"❌ {test_name} - FAILED")
+
     print("\n" + "=" * 50)
     print(f"Test Results: {passed}/{total} tests passed")
-    
+
     if passed == total:
         print("🎉 All tests passed! The API is working correctly.")
         print("\n🌐 Access the application at:")
@@ -81,4 +93,4 @@ def main():
         print("⚠️  Some tests failed. Please check the logs.")
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())